@@ -1,34 +1,665 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient
 from pymongo.collection import Collection
+import bson
+from bson.codec_options import CodecOptions
 from pymongo.operations import SearchIndexModel
+from bson.binary import Binary, BinaryVectorDtype
+import asyncio
+import base64
+import copy
+import functools
+import hashlib
 import logging
+import os
+import threading
 import time
-from pymongo.errors import OperationFailure
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pymongo.errors import OperationFailure, PyMongoError
 
 
 # Get Embedding Function
+import numpy as np
 import openai
-from typing import List
-def get_embedding(text: str, model: str = "text-embedding-3-small", dimensions: int = 256) -> List[float]:
-    text = text.replace("\n", " ")
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+# Hand-maintained so `from demo import *` exports only this module's API, not its imports
+__all__ = (
+    "Document",
+    "EmbeddingCache",
+    "PymongoPlus",
+    "SemanticCache",
+    "aget_embedding",
+    "get_embedding",
+    "get_embeddings",
+    "get_embeddings_parallel",
+    "embed_batch_np",
+)
+
+# Set ENABLE_EMBEDDING_CACHE=false to always hit the embeddings API
+ENABLE_EMBEDDING_CACHE = os.getenv("ENABLE_EMBEDDING_CACHE", "true").lower() in ("1", "true", "yes")
+# Upper bound on the vectors held in memory, by the module LRU and by each EmbeddingCache's L1
+EMBEDDING_CACHE_CAPACITY = int(os.getenv("EMBEDDING_CACHE_CAPACITY", "10000"))
+
+# Where EmbeddingCache persists vectors for PymongoPlus clients
+EMBEDDING_CACHE_DATABASE = "_pymongoplus"
+EMBEDDING_CACHE_COLLECTION = "_embedding_cache"
+
+# Document fields holding the float32 and int8-quantized embeddings
+EMBEDDING_PATH = "embedding"
+QUANTIZED_EMBEDDING_PATH = "embedding_int8"
+
+# $vectorSearch candidates examined per requested result, and the server's cap on them
+NUM_CANDIDATES_PER_RESULT = 20
+MAX_NUM_CANDIDATES = 10000
+
+# Seconds a list_collection_names result is reused
+COLLECTION_NAMES_TTL = 5.0
+
+# Databases whose collection names, and search indexes confirmed ready, each PymongoPlus remembers
+MAX_COLLECTION_NAMES_ENTRIES = 256
+MAX_READY_INDEXES = 1024
+
+# Server error code returned by `create` when the collection already exists
+NAMESPACE_EXISTS = 48
+
+
+# openai's own connection caps, but idle connections are kept for 30s instead of 5s so that
+# successive embedding bursts reuse them. The Limits class comes from whichever httpx package
+# openai is built on.
+_HTTP_LIMITS = type(openai.DEFAULT_CONNECTION_LIMITS)(
+    max_keepalive_connections=100, max_connections=1000, keepalive_expiry=30.0
+)
+
+_openai_client_lock = threading.Lock()
+_openai_sync_client: Optional[openai.OpenAI] = None
+
+
+def _openai_client() -> openai.OpenAI:
+    """
+    Return the process-wide OpenAI client.
+    Built on first use rather than at import so the module loads without an API key;
+    the pool is sized for the workers in `get_embeddings_parallel`.
+    """
+    global _openai_sync_client
+    if _openai_sync_client is None:
+        # Worker threads can all arrive here on the first batch; only one may build the client
+        with _openai_client_lock:
+            if _openai_sync_client is None:
+                _openai_sync_client = openai.OpenAI(
+                    http_client=openai.DefaultHttpxClient(limits=_HTTP_LIMITS, timeout=30)
+                )
+    return _openai_sync_client
+
+
+# Line breaks and tabs become spaces before embedding; str.translate does this in one C-level pass
+_NL_TABLE = str.maketrans({"\n": " ", "\r": " ", "\t": " "})
+
+# The embeddings endpoint accepts at most this many inputs per request
+EMBEDDING_BATCH_SIZE = 2048
+
+
+def get_embeddings(
+    texts: List[str], model: str = "text-embedding-3-small", dimensions: int = 256
+) -> List[List[float]]:
+    """
+    Embed many texts with as few API requests as possible.
+    :param texts: The texts to embed.
+    :param model: The embedding model.
+    :param dimensions: The number of dimensions of each embedding.
+    :return: One embedding per text, in input order.
+    """
+    texts = [text.translate(_NL_TABLE) for text in texts]
+    embeddings = []
     try:
-        return openai.OpenAI().embeddings.create(input=[text], model=model, dimensions=dimensions).data[0].embedding
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            response = _openai_client().embeddings.create(
+                input=texts[start:start + EMBEDDING_BATCH_SIZE], model=model, dimensions=dimensions
+            )
+            embeddings.extend(d.embedding for d in sorted(response.data, key=lambda d: d.index))
+    except Exception as e:
+        logger.error(f"Error generating embeddings: {str(e)}")
+        raise
+    return embeddings
+
+
+def embed_batch_np(
+    texts: List[str],
+    model: str = "text-embedding-3-small",
+    dimensions: int = 256,
+    batch_size: int = 96,
+    max_workers: int = 16,
+) -> np.ndarray:
+    """
+    Embed many texts into one contiguous float32 array, with several requests in flight at once.
+    The calls are I/O-bound, so threads overlap their network latency despite the GIL. Vectors
+    are requested base64-encoded and decoded straight into the array, so no Python float is
+    created per dimension.
+    :param texts: The texts to embed.
+    :param model: The embedding model.
+    :param dimensions: The number of dimensions of each embedding.
+    :param batch_size: The number of texts sent per request.
+    :param max_workers: The maximum number of concurrent requests.
+    :return: An array of shape (len(texts), dimensions), rows in input order.
+    """
+    out = np.empty((len(texts), dimensions), dtype=np.float32)
+
+    def fill(start: int) -> None:
+        response = _openai_client().embeddings.create(
+            input=[text.translate(_NL_TABLE) for text in texts[start:start + batch_size]],
+            model=model,
+            dimensions=dimensions,
+            encoding_format="base64",
+        )
+        for d in response.data:
+            out[start + d.index] = np.frombuffer(base64.b64decode(d.embedding), dtype=np.float32)
+
+    starts = range(0, len(texts), batch_size)
+    try:
+        # Each batch writes a disjoint slice of `out`, so threads need no coordination
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(starts)))) as executor:
+            list(executor.map(fill, starts))
+    except Exception as e:
+        logger.error(f"Error generating embeddings: {str(e)}")
+        raise
+    return out
+
+
+def get_embeddings_parallel(
+    texts: List[str],
+    model: str = "text-embedding-3-small",
+    dimensions: int = 256,
+    batch_size: int = 96,
+    max_workers: int = 16,
+) -> List[List[float]]:
+    """
+    Embed many texts with several requests in flight at once; `embed_batch_np` as lists.
+    :param texts: The texts to embed.
+    :param model: The embedding model.
+    :param dimensions: The number of dimensions of each embedding.
+    :param batch_size: The number of texts sent per request.
+    :param max_workers: The maximum number of concurrent requests.
+    :return: One embedding per text, in input order.
+    """
+    return embed_batch_np(
+        texts, model=model, dimensions=dimensions, batch_size=batch_size, max_workers=max_workers
+    ).tolist()
+
+
+def _quantize_int8_batch(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scalar-quantize each row of a float matrix to int8, a quarter the size of float32.
+    :return: The int8 matrix and the per-row scales that map it back to floats.
+    """
+    max_abs = np.abs(matrix).max(axis=1, keepdims=True)
+    max_abs[max_abs == 0] = 1.0
+    quantized = np.clip(np.rint(matrix * (127 / max_abs)), -127, 127).astype(np.int8)
+    return quantized, max_abs[:, 0] / 127
+
+
+def _quantize_int8(vector: List[float]) -> Tuple[Binary, float]:
+    """
+    Scalar-quantize a vector to int8 BinData.
+    :return: The quantized vector and the scale that maps it back to floats.
+    """
+    quantized, scales = _quantize_int8_batch(np.asarray(vector, dtype=np.float32)[np.newaxis, :])
+    return Binary.from_vector(quantized[0], BinaryVectorDtype.INT8), float(scales[0])
+
+
+def _normalize_text(text: str) -> str:
+    """Collapse runs of whitespace so trivially different inputs share a cache entry."""
+    return " ".join(text.split())
+
+
+def _embed_uncached(text: str, model: str, dimensions: int) -> Tuple[float, ...]:
+    # Tuples are immutable, so cached vectors can't be mutated by callers
+    return tuple(get_embeddings([text], model=model, dimensions=dimensions)[0])
+
+
+# Cache is keyed on (text, model, dimensions); repeated queries skip the HTTP round-trip
+_embed_cached = functools.lru_cache(maxsize=EMBEDDING_CACHE_CAPACITY)(_embed_uncached)
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache.
+    L1 is an in-process LRU; L2 is an optional MongoDB collection shared across
+    processes, whose entries expire through a TTL index on `created_at`.
+    """
+
+    def __init__(
+        self,
+        collection: Optional[Collection] = None,
+        l1_size: int = EMBEDDING_CACHE_CAPACITY,
+        ttl_seconds: int = 7 * 24 * 3600,
+    ):
+        """
+        :param collection: The collection backing L2, or None for an in-process cache only.
+        :param l1_size: The maximum number of vectors kept in memory.
+        :param ttl_seconds: How long L2 entries live before MongoDB removes them.
+        """
+        self._l1: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._l1_size = l1_size
+        # Guards L1 and the counters; PymongoPlus, like MongoClient, is shared across threads
+        self._lock = threading.Lock()
+        self._collection = collection
+        self._ttl_seconds = ttl_seconds
+        # Set after the first attempt, successful or not, so a user without createIndex rights
+        # doesn't retry it on every miss
+        self._ttl_index_attempted = False
+        self._l1_hits = 0
+        self._l2_hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _key(text: str, model: str, dimensions: int) -> str:
+        return hashlib.sha256(f"{model}\0{dimensions}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: Tuple[float, ...]) -> None:
+        with self._lock:
+            self._l1[key] = vector
+            self._l1.move_to_end(key)
+            if len(self._l1) > self._l1_size:
+                self._l1.popitem(last=False)
+
+    def get(self, text: str, model: str, dimensions: int, local_only: bool = False) -> Optional[Tuple[float, ...]]:
+        """Return the cached vector for the text, or None on a miss; `local_only` skips L2."""
+        key = self._key(text, model, dimensions)
+        with self._lock:
+            vector = self._l1.get(key)
+            if vector is not None:
+                self._l1.move_to_end(key)
+                self._l1_hits += 1
+                return vector
+        # L2 is a network call, so it runs outside the lock
+        entry = None
+        if self._collection is not None and not local_only:
+            try:
+                entry = self._collection.find_one({"_id": key}, {"vec": 1})
+            except Exception as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._l2_hits += 1
+        vector = tuple(np.frombuffer(entry["vec"], dtype=np.float32).tolist())
+        self._remember(key, vector)
+        return vector
+
+    def put(self, text: str, model: str, dimensions: int, vector: Tuple[float, ...], local_only: bool = False) -> None:
+        """Store the vector in L1 and, if configured and not `local_only`, in L2."""
+        key = self._key(text, model, dimensions)
+        self._remember(key, vector)
+        if self._collection is None or local_only:
+            return
+        try:
+            if not self._ttl_index_attempted:
+                self._ttl_index_attempted = True
+                try:
+                    self._collection.create_index([("created_at", 1)], expireAfterSeconds=self._ttl_seconds)
+                except Exception as e:
+                    logger.warning(f"Embedding cache TTL index could not be created; entries will not expire: {e}")
+            self._collection.replace_one(
+                {"_id": key},
+                {
+                    "vec": Binary(np.asarray(vector, dtype=np.float32).tobytes()),
+                    "model": model,
+                    "created_at": datetime.now(timezone.utc),
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit and miss counters along with the current L1 size."""
+        with self._lock:
+            return {
+                "l1_hits": self._l1_hits,
+                "l2_hits": self._l2_hits,
+                "misses": self._misses,
+                "l1_size": len(self._l1),
+                "l1_capacity": self._l1_size,
+            }
+
+
+def get_embedding(
+    text: str, model: str = "text-embedding-3-small", dimensions: int = 256, cache: Optional[EmbeddingCache] = None
+) -> List[float]:
+    if not ENABLE_EMBEDDING_CACHE:
+        return get_embeddings([text], model=model, dimensions=dimensions)[0]
+    text = _normalize_text(text)
+    if cache is not None:
+        vector = cache.get(text, model, dimensions)
+        if vector is None:
+            vector = _embed_uncached(text, model, dimensions)
+            cache.put(text, model, dimensions, vector)
+        return list(vector)
+    return list(_embed_cached(text, model, dimensions))
+
+
+# Async connections belong to the loop that opened them, so each event loop gets its own client;
+# entries disappear with their loop
+_async_openai_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _async_openai_client() -> openai.AsyncOpenAI:
+    """Return the async OpenAI client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_openai_clients.get(loop)
+    if client is None:
+        client = openai.AsyncOpenAI(http_client=openai.DefaultAsyncHttpxClient(limits=_HTTP_LIMITS, timeout=30))
+        _async_openai_clients[loop] = client
+    return client
+
+
+async def aget_embedding(
+    text: str, model: str = "text-embedding-3-small", dimensions: int = 256, cache: Optional[EmbeddingCache] = None
+) -> List[float]:
+    """
+    Async counterpart of `get_embedding`, for overlapping many requests on one event loop.
+    Only the cache's in-process tier is consulted; its MongoDB tier would block the loop.
+    """
+    text = text.translate(_NL_TABLE)
+    if not ENABLE_EMBEDDING_CACHE:
+        cache = None
+    if cache is not None:
+        text = _normalize_text(text)
+        vector = cache.get(text, model, dimensions, local_only=True)
+        if vector is not None:
+            return list(vector)
+    try:
+        response = await _async_openai_client().embeddings.create(input=[text], model=model, dimensions=dimensions)
     except Exception as e:
         logger.error(f"Error generating embedding: {str(e)}")
         raise
+    embedding = response.data[0].embedding
+    if cache is not None:
+        cache.put(text, model, dimensions, tuple(embedding), local_only=True)
+    return embedding
+
+
+def _filters_key(filters: Optional[Dict[str, Any]], codec_options: CodecOptions) -> bytes:
+    """
+    Encode filters into a hashable cache key.
+    Uses the client's codec options, so anything the driver can send (UUIDs included) has a key.
+    """
+    return bson.encode(filters, codec_options=codec_options) if filters else b""
+
+
+class SemanticCache:
+    """
+    Approximate-match cache for search results.
+    A query whose embedding has cosine similarity above `threshold` with a recently
+    seen query is served that query's results, skipping the `$vectorSearch` round-trip.
+    """
+
+    def __init__(
+        self, threshold: float = 0.95, ttl_seconds: float = 300.0, max_entries: int = 1024, max_namespaces: int = 64
+    ):
+        """
+        :param threshold: The minimum cosine similarity for a hit.
+        :param ttl_seconds: How long cached results stay valid.
+        :param max_entries: The maximum number of queries remembered per namespace.
+        :param max_namespaces: The maximum number of namespaces; the least recently used is evicted.
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_namespaces = max_namespaces
+        # namespace -> (unit query vectors stacked row-wise, [(created_at, results)])
+        self._namespaces: "OrderedDict[Tuple, Tuple[np.ndarray, List[Tuple[float, list]]]]" = OrderedDict()
+        # Guards `_namespaces` and the counters against concurrent searches
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self, namespace: Tuple) -> None:
+        # Callers hold the lock
+        matrix, entries = self._namespaces[namespace]
+        cutoff = time.monotonic() - self.ttl_seconds
+        # Entries are appended in time order, so the stale ones form a prefix
+        stale = 0
+        while stale < len(entries) and entries[stale][0] < cutoff:
+            stale += 1
+        if stale == len(entries):
+            del self._namespaces[namespace]
+        elif stale:
+            self._namespaces[namespace] = (matrix[stale:], entries[stale:])
+
+    def get(self, namespace: Tuple, query_embedding: List[float]) -> Optional[list]:
+        """Return the results cached for a near-duplicate query, or None on a miss."""
+        query = self._unit(query_embedding)
+        with self._lock:
+            if namespace in self._namespaces:
+                self._expire(namespace)
+            if namespace not in self._namespaces:
+                self._misses += 1
+                return None
+            self._namespaces.move_to_end(namespace)
+            matrix, entries = self._namespaces[namespace]
+            sims = matrix @ query
+            best = int(sims.argmax())
+            if sims[best] < self.threshold:
+                self._misses += 1
+                return None
+            self._hits += 1
+            results = entries[best][1]
+        # Copies, so a caller editing its results can't change what later hits receive;
+        # stored lists are never mutated, so this can run outside the lock
+        return copy.deepcopy(results)
+
+    def put(self, namespace: Tuple, query_embedding: List[float], results: list) -> None:
+        """Remember the results returned for a query."""
+        row = self._unit(query_embedding)[np.newaxis, :]
+        results = copy.deepcopy(results)
+        with self._lock:
+            entry = (time.monotonic(), results)
+            if namespace in self._namespaces:
+                matrix, entries = self._namespaces[namespace]
+                # Keep the newest max_entries - 1 rows to make room for this one
+                start = max(len(entries) - self.max_entries + 1, 0)
+                matrix = np.vstack((matrix[start:], row))
+                entries = entries[start:] + [entry]
+            else:
+                matrix, entries = row, [entry]
+            self._namespaces[namespace] = (matrix, entries)
+            self._namespaces.move_to_end(namespace)
+            if len(self._namespaces) > self.max_namespaces:
+                self._namespaces.popitem(last=False)
+
+    def invalidate(self, prefix: Tuple) -> None:
+        """Forget the results of every namespace that starts with `prefix`."""
+        with self._lock:
+            for namespace in [ns for ns in self._namespaces if ns[: len(prefix)] == prefix]:
+                del self._namespaces[namespace]
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit and miss counters along with the number of cached queries."""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "namespaces": len(self._namespaces),
+                "entries": sum(len(entries) for _, entries in self._namespaces.values()),
+            }
+
+
+@functools.lru_cache(maxsize=32)
+def _probe_dimensions(get_embedding: callable) -> int:
+    return len(get_embedding("0"))
+
+
+def _resolve_dimensions(num_dimensions: Optional[int], get_embedding: Optional[callable]) -> int:
+    """Return the index vector size, calling `get_embedding` at most once per function."""
+    if num_dimensions is not None:
+        return num_dimensions
+    if get_embedding is None:
+        return 256
+    return _probe_dimensions(get_embedding)
+
+
+@functools.lru_cache(maxsize=256)
+def _pipeline_template(index_name: str, limit: int, quantized: bool) -> Tuple[Dict[str, Any], ...]:
+    """
+    Build the `$vectorSearch` pipeline minus its query vector and filter.
+    The stages are shared between calls and must not be mutated.
+    """
+    vector_search = {
+        "index": index_name,
+        "limit": limit,
+        # HNSW recall needs candidates well beyond limit; the server caps numCandidates
+        "numCandidates": min(limit * NUM_CANDIDATES_PER_RESULT, MAX_NUM_CANDIDATES),
+        "path": QUANTIZED_EMBEDDING_PATH if quantized else EMBEDDING_PATH,
+    }
+    return (
+        {"$vectorSearch": vector_search},
+        # An inclusion projection drops `embedding` and adds the score in one stage
+        {
+            "$project": {
+                "_id": 1,
+                # Defaults are filled in server-side so every result carries every field
+                "name": {"$ifNull": ["$name", None]},
+                "content": 1,
+                "meta_data": {"$ifNull": ["$meta_data", {"$literal": {}}]},
+                "score": {"$meta": "vectorSearchScore"},
+            }
+        },
+    )
+
+
+def _build_pipeline(
+    query_embedding: List[float], limit: int, index_name: str, filters: Optional[Dict[str, Any]], quantized: bool
+) -> List[Dict[str, Any]]:
+    # The server rejects a limit above numCandidates, which cannot exceed MAX_NUM_CANDIDATES
+    vector_search, *stages = _pipeline_template(index_name, min(limit, MAX_NUM_CANDIDATES), quantized)
+    # Only the query vector and filter change between calls; copy the stage rather than the whole pipeline
+    vector_search = dict(vector_search["$vectorSearch"])
+    # An int8 index must be queried with an int8 vector
+    vector_search["queryVector"] = _quantize_int8(query_embedding)[0] if quantized else query_embedding
+    if filters:
+        # Pre-filter inside the HNSW traversal rather than with a trailing $match; the caller's
+        # dict is passed through so the driver encodes it with the client's codec options
+        vector_search["filter"] = filters
+    return [{"$vectorSearch": vector_search}, *stages]
+
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+@dataclass(slots=True)
+class Document:
+    """A search result; `score` is only set by vector search."""
+
+    id: str
+    name: Optional[str]
+    content: str
+    meta_data: Dict[str, Any] = field(default_factory=dict)
+    score: Optional[float] = None
+
+
 # Custom MongoClient wrapper
 class PymongoPlus(MongoClient):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, semantic_cache: bool = True, persist_embeddings: Union[bool, Collection] = True, **kwargs):
         """
         Extend the original MongoClient initialization.
         Pass all arguments to the real MongoClient.
+        :param semantic_cache: Serve near-duplicate queries from a `SemanticCache`; pass False
+            to always run the vector search.
+        :param persist_embeddings: Where `EmbeddingCache` persists query vectors: True for
+            `_pymongoplus._embedding_cache` on this deployment, a Collection to use that one, or
+            False to keep them in process only.
         """
         super().__init__(*args, **kwargs)
+        # Kept so `asearch` can open an AsyncMongoClient to the same deployment, one per event loop
+        self._client_args = (args, kwargs)
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncMongoClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # By default query vectors survive restarts and are shared by every process using this deployment
+        if persist_embeddings is True:
+            persist_embeddings = self[EMBEDDING_CACHE_DATABASE][EMBEDDING_CACHE_COLLECTION]
+        self.embedding_cache = EmbeddingCache(None if persist_embeddings is False else persist_embeddings)
+        self.semantic_cache: Optional[SemanticCache] = SemanticCache() if semantic_cache else None
+        # (database, collection, index) triples already confirmed on the server, least recently used first
+        self._index_ready: "OrderedDict[Tuple[str, str, str], None]" = OrderedDict()
+        # database -> (fetched_at, known collection names, whether the names are a full listing)
+        self._coll_names_cache: "OrderedDict[str, Tuple[float, Set[str], bool]]" = OrderedDict()
+        # Guards `_index_ready` and `_coll_names_cache` against concurrent callers
+        self._memo_lock = threading.Lock()
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Report hit and miss counters for every cache used by this client.
+        :return: Counters keyed by cache name.
+        """
+        info = _embed_cached.cache_info()
+        return {
+            "embedding_lru": {"hits": info.hits, "misses": info.misses, "size": info.currsize, "capacity": info.maxsize},
+            "embedding_cache": self.embedding_cache.stats(),
+            "semantic_cache": self.semantic_cache.stats() if self.semantic_cache is not None else {},
+            "collection_names": {"size": len(self._coll_names_cache), "capacity": MAX_COLLECTION_NAMES_ENTRIES},
+            "index_ready": {"size": len(self._index_ready), "capacity": MAX_READY_INDEXES},
+        }
+
+    def _is_index_ready(self, key: Tuple[str, str, str]) -> bool:
+        with self._memo_lock:
+            if key not in self._index_ready:
+                return False
+            self._index_ready.move_to_end(key)
+            return True
+
+    def _mark_index_ready(self, key: Tuple[str, str, str]) -> None:
+        with self._memo_lock:
+            self._index_ready[key] = None
+            self._index_ready.move_to_end(key)
+            if len(self._index_ready) > MAX_READY_INDEXES:
+                self._index_ready.popitem(last=False)
+
+    def _cached_collection_names(self, database_name: str) -> Optional[Tuple[float, Set[str], bool]]:
+        """Return the fresh collection-names entry for a database, dropping it if it has expired."""
+        with self._memo_lock:
+            cached = self._coll_names_cache.get(database_name)
+            if cached is None:
+                return None
+            if time.monotonic() - cached[0] >= COLLECTION_NAMES_TTL:
+                del self._coll_names_cache[database_name]
+                return None
+            self._coll_names_cache.move_to_end(database_name)
+            return cached
+
+    def _store_collection_names(self, database_name: str, names: Set[str], complete: bool) -> None:
+        with self._memo_lock:
+            self._coll_names_cache[database_name] = (time.monotonic(), names, complete)
+            self._coll_names_cache.move_to_end(database_name)
+            if len(self._coll_names_cache) > MAX_COLLECTION_NAMES_ENTRIES:
+                self._coll_names_cache.popitem(last=False)
+
+    def get_collection_names(self, database_name: str) -> Set[str]:
+        """
+        List the collections in a database, reusing results fetched within the last few seconds.
+        :param database_name: The database name.
+        :return: The collection names.
+        """
+        cached = self._cached_collection_names(database_name)
+        if cached is not None and cached[2]:
+            return set(cached[1])
+        names = set(self[database_name].list_collection_names())
+        self._store_collection_names(database_name, names, True)
+        return set(names)
 
     def create_if_not_exists(self, database_name: str, collection_name: str) -> Collection:
         """
@@ -38,17 +669,23 @@ class PymongoPlus(MongoClient):
         :return: The collection object.
         """
         database = self[database_name]
-        collection_names = database.list_collection_names()
-
-        if collection_name not in collection_names:
-            logger.info(f"Collection '{collection_name}' does not exist. Creating it now.")
-            # Create the collection by accessing it and optionally inserting a dummy document
-            collection = database[collection_name]
-            collection.insert_one({"_id": 0, "placeholder": True})
-            collection.delete_one({"_id": 0})  # Remove the placeholder document
+        cached = self._cached_collection_names(database_name)
+        if cached is not None and collection_name in cached[1]:
+            return database[collection_name]
+        try:
+            # A single `create` command; the server reports NamespaceExists if it is already there
+            collection = database.create_collection(collection_name, check_exists=False)
             logger.info(f"Collection '{collection_name}' created successfully.")
-        else:
+        except OperationFailure as e:
+            if e.code != NAMESPACE_EXISTS:
+                raise
             collection = database[collection_name]
+        if cached is not None:
+            with self._memo_lock:
+                cached[1].add(collection_name)
+        else:
+            # Start a partial entry; get_collection_names still lists from the server
+            self._store_collection_names(database_name, {collection_name}, False)
 
         return collection
 
@@ -58,16 +695,23 @@ class PymongoPlus(MongoClient):
         collection_name: str,
         index_name: str,
         # get_embedding should be a function that returns the embedding for a document
-        get_embedding: callable,
+        get_embedding: Optional[callable] = None,
         distance_metric: str = "euclidean",
+        filter_paths: Optional[List[str]] = None,
+        quantized: bool = False,
+        num_dimensions: Optional[int] = None,
     ) -> None:
         """
         Create the Atlas Search index for vector search.
         :param database_name: The database where the collection resides.
         :param collection_name: The collection for which to create the search index.
         :param index_name: The name of the search index.
-        :param num_dimensions: The number of dimensions for the vector search.
+        :param get_embedding: Probed once for the vector size when `num_dimensions` is not given.
         :param distance_metric: The distance metric for similarity (default: 'euclidean').
+        :param filter_paths: Fields that `search` filters may pre-filter on.
+        :param quantized: Index the int8 vectors written by `insert_embeddings(quantize=True)`.
+            Quantization scales each vector independently, so use 'cosine' with it.
+        :param num_dimensions: The number of dimensions for the vector search (default: 256).
         """
         try:
             # Ensure the collection exists
@@ -79,6 +723,8 @@ class PymongoPlus(MongoClient):
                 return
 
             logger.info(f"Creating search index '{index_name}' for collection '{collection_name}'.")
+            if quantized and distance_metric != "cosine":
+                logger.warning(f"Quantized vectors are scaled per vector; '{distance_metric}' scores will be skewed.")
 
             # Build the search index model
             search_index_model = SearchIndexModel(
@@ -86,11 +732,12 @@ class PymongoPlus(MongoClient):
                     "fields": [
                         {
                             "type": "vector",
-                            "numDimensions": len(get_embedding("0")),
-                            "path": "embedding",
+                            "numDimensions": _resolve_dimensions(num_dimensions, get_embedding),
+                            "path": QUANTIZED_EMBEDDING_PATH if quantized else EMBEDDING_PATH,
                             "similarity": distance_metric,
                         },
                     ]
+                    + [{"type": "filter", "path": path} for path in filter_paths or []]
                 },
                 name=index_name,
                 type="vectorSearch",
@@ -109,11 +756,51 @@ class PymongoPlus(MongoClient):
         except Exception as e:
             logger.error(f"Failed to create search index '{index_name}': {e}")
             raise e
+    def insert_embeddings(
+        self,
+        database_name: str,
+        collection_name: str,
+        documents: List[Dict[str, Any]],
+        text_field: str = "content",
+        model: str = "text-embedding-3-small",
+        dimensions: int = 256,
+        quantize: bool = False,
+    ) -> List[Any]:
+        """
+        Embed and insert documents.
+        :param database_name: The database where the collection resides.
+        :param collection_name: The collection to insert into.
+        :param documents: The documents to insert; each gets an `embedding` field holding a
+            float32 BSON vector.
+        :param text_field: The field whose text is embedded.
+        :param model: The embedding model.
+        :param dimensions: The number of dimensions of each embedding.
+        :param quantize: Also store an int8 copy in `embedding_int8`, with its scale in
+            `embedding_scale`, for indexes created with `quantized=True`.
+        :return: The ids of the inserted documents.
+        """
+        if not documents:
+            return []
+        embeddings = embed_batch_np([document[text_field] for document in documents], model=model, dimensions=dimensions)
+        if quantize:
+            quantized, scales = _quantize_int8_batch(embeddings)
+        for i, document in enumerate(documents):
+            # 4 bytes per dimension, against 8 plus a key per element for a BSON array of doubles
+            document[EMBEDDING_PATH] = Binary.from_vector(embeddings[i], BinaryVectorDtype.FLOAT32)
+            if quantize:
+                document[QUANTIZED_EMBEDDING_PATH] = Binary.from_vector(quantized[i], BinaryVectorDtype.INT8)
+                document["embedding_scale"] = float(scales[i])
+        inserted_ids = self[database_name][collection_name].insert_many(documents).inserted_ids
+        # Cached searches over this collection predate the new documents
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate((database_name, collection_name))
+        return inserted_ids
+
     def search(
-        self, query: str, limit: int = 5, database_name:str = "", collection_name:str = "", index_name: str = "", filters: Optional[Dict[str, Any]] = None
+        self, query: str, limit: int = 5, database_name:str = "", collection_name:str = "", index_name: str = "", filters: Optional[Dict[str, Any]] = None, quantized: bool = False
     ) -> List[Document]:
         """Search the MongoDB collection for documents relevant to the query."""
-        query_embedding = get_embedding(query)
+        query_embedding = get_embedding(query, cache=self.embedding_cache)
         if not self.index_exists(database_name, collection_name, index_name):
             logger.error(f"Index {index_name} does not exist.")
             return []
@@ -122,35 +809,133 @@ class PymongoPlus(MongoClient):
             return []
 
         try:
-            pipeline = [
-                {
-                    "$vectorSearch": {
-                        "index": index_name,
-                        "limit": 10,
-                        "numCandidates": 10,
-                        "queryVector": self.embedder.get_embedding(query),
-                        "path": "embedding",
-                    }
-                },
-                {"$set": {"score": {"$meta": "vectorSearchScore"}}},
-            ]
-            pipeline.append({"$project": {"embedding": 0}})
-            agg = list(self._collection.aggregate(pipeline))
-            docs = []
-            for doc in agg:
-                docs.append(
-                    Document(
-                        id=str(doc["_id"]),
-                        name=doc.get("name"),
-                        content=doc["content"],
-                        meta_data=doc.get("meta_data", {}),
-                    )
+            # Near-duplicate queries against the same index and filters share results
+            namespace = self._semantic_namespace(database_name, collection_name, index_name, filters, limit, quantized)
+            cached_docs = self.semantic_cache.get(namespace, query_embedding) if self.semantic_cache is not None else None
+            if cached_docs is not None:
+                logger.info(f"Search served from semantic cache. Found {len(cached_docs)} documents.")
+                return cached_docs
+
+            docs = list(
+                self._vector_search(
+                    query_embedding, limit, database_name, collection_name, index_name, filters, quantized
                 )
+            )
             logger.info(f"Search completed. Found {len(docs)} documents.")
+            if self.semantic_cache is not None:
+                self.semantic_cache.put(namespace, query_embedding, docs)
             return docs
         except Exception as e:
             logger.error(f"Error during search: {e}")
             return []
+
+    def _semantic_namespace(
+        self,
+        database_name: str,
+        collection_name: str,
+        index_name: str,
+        filters: Optional[Dict[str, Any]],
+        limit: int,
+        quantized: bool,
+    ) -> Optional[Tuple]:
+        """Return the SemanticCache namespace for a search, or None when the cache is off."""
+        if self.semantic_cache is None:
+            return None
+        filters_key = _filters_key(filters, self.codec_options)
+        return (database_name, collection_name, index_name, filters_key, limit, quantized)
+
+    def iter_search(
+        self, query: str, limit: int = 5, database_name: str = "", collection_name: str = "", index_name: str = "", filters: Optional[Dict[str, Any]] = None, quantized: bool = False
+    ) -> Iterator[Document]:
+        """Yield the documents relevant to the query as the driver receives them."""
+        query_embedding = get_embedding(query, cache=self.embedding_cache)
+        if not self.index_exists(database_name, collection_name, index_name):
+            logger.error(f"Index {index_name} does not exist.")
+            return
+        yield from self._vector_search(
+            query_embedding, limit, database_name, collection_name, index_name, filters, quantized
+        )
+
+    def _vector_search(
+        self,
+        query_embedding: List[float],
+        limit: int,
+        database_name: str,
+        collection_name: str,
+        index_name: str,
+        filters: Optional[Dict[str, Any]] = None,
+        quantized: bool = False,
+    ) -> Iterator[Document]:
+        """Run the `$vectorSearch` aggregation, streaming results batch by batch."""
+        pipeline = _build_pipeline(query_embedding, limit, index_name, filters, quantized)
+        # Iterate the cursor instead of materializing it, so at most one batch is held in memory
+        cursor = self[database_name][collection_name].aggregate(pipeline, batchSize=min(limit, 128))
+        yield from (
+            Document(id=str(d["_id"]), name=d["name"], content=d["content"], meta_data=d["meta_data"], score=d["score"])
+            for d in cursor
+        )
+
+    def _async_client(self) -> AsyncMongoClient:
+        """Return the AsyncMongoClient for the running event loop, opening it on first use."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            args, kwargs = self._client_args
+            client = AsyncMongoClient(*args, **kwargs)
+            self._async_clients[loop] = client
+        return client
+
+    async def aclose(self) -> None:
+        """
+        Close the async MongoDB and OpenAI clients opened on the running event loop.
+        Call this before the loop shuts down when `asearch` or `aget_embedding` were used.
+        """
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+        openai_client = _async_openai_clients.pop(asyncio.get_running_loop(), None)
+        if openai_client is not None:
+            await openai_client.close()
+
+    async def asearch(
+        self, query: str, limit: int = 5, database_name: str = "", collection_name: str = "", index_name: str = "", filters: Optional[Dict[str, Any]] = None, quantized: bool = False
+    ) -> List[Document]:
+        """
+        Async counterpart of `search`, for serving many concurrent queries from one event loop.
+        The embedding and the aggregation are awaited; the sync client is only used, off the
+        loop, for an index existence check that has not been memoized yet. Call `aclose()`
+        when done.
+        """
+        query_embedding = await aget_embedding(query, cache=self.embedding_cache)
+        if not self._is_index_ready((database_name, collection_name, index_name)) and not await asyncio.to_thread(
+            self.index_exists, database_name, collection_name, index_name
+        ):
+            logger.error(f"Index {index_name} does not exist.")
+            return []
+
+        try:
+            namespace = self._semantic_namespace(database_name, collection_name, index_name, filters, limit, quantized)
+            cached_docs = self.semantic_cache.get(namespace, query_embedding) if self.semantic_cache is not None else None
+            if cached_docs is not None:
+                logger.info(f"Search served from semantic cache. Found {len(cached_docs)} documents.")
+                return cached_docs
+
+            pipeline = _build_pipeline(query_embedding, limit, index_name, filters, quantized)
+            cursor = await self._async_client()[database_name][collection_name].aggregate(
+                pipeline, batchSize=min(limit, 128)
+            )
+            docs = [
+                Document(id=str(d["_id"]), name=d["name"], content=d["content"], meta_data=d["meta_data"], score=d["score"])
+                async for d in cursor
+            ]
+            logger.info(f"Search completed. Found {len(docs)} documents.")
+            if self.semantic_cache is not None:
+                self.semantic_cache.put(namespace, query_embedding, docs)
+            return docs
+        except Exception as e:
+            logger.error(f"Error during search: {e}")
+            return []
+
     def keyword_search(self, query: str, limit: int = 5) -> List[Document]:
         """Perform a keyword-based search."""
         try:
@@ -185,10 +970,15 @@ class PymongoPlus(MongoClient):
         :param index_name: The name of the search index to check.
         :return: True if the index exists, False otherwise.
         """
+        key = (database_name, collection_name, index_name)
+        if self._is_index_ready(key):
+            return True
         try:
             collection = self[database_name][collection_name]
-            indexes = list(collection.list_search_indexes())
-            exists = any(index["name"] == index_name for index in indexes)
+            # The name filter is applied server-side, so this is either empty or the one index
+            exists = bool(list(collection.list_search_indexes(name=index_name)))
+            if exists:
+                self._mark_index_ready(key)
             return exists
         except OperationFailure as e:
             logger.error(f"Operation failure while checking index existence: {e}")
@@ -197,6 +987,41 @@ class PymongoPlus(MongoClient):
             logger.error(f"Error checking search index existence for '{index_name}': {e}")
             return False
 
+    def wait_for_index(
+        self, database_name: str, collection_name: str, index_name: str, max_attempts: int = 10, max_delay: float = 5.0
+    ) -> bool:
+        """
+        Poll until the search index is queryable, backing off exponentially between checks.
+        :param database_name: The database where the collection resides.
+        :param collection_name: The collection to check.
+        :param index_name: The name of the search index to wait for.
+        :param max_attempts: The maximum number of polls after the first check.
+        :param max_delay: The longest wait between polls, in seconds.
+        :return: True if the index became queryable, False otherwise.
+        """
+        collection = self[database_name][collection_name]
+        for attempt in range(max_attempts + 1):
+            try:
+                # Filter by name server-side so at most one index comes back
+                indexes = list(collection.list_search_indexes(name=index_name))
+            except OperationFailure as e:
+                logger.error(f"Operation failure while checking index existence: {e}")
+                indexes = []
+            except PyMongoError as e:
+                # Transient errors such as AutoReconnect just count as a failed poll
+                logger.error(f"Error checking search index existence for '{index_name}': {e}")
+                indexes = []
+            if indexes and (indexes[0].get("queryable") or indexes[0].get("status") == "READY"):
+                self._mark_index_ready((database_name, collection_name, index_name))
+                return True
+            if attempt == max_attempts:
+                break
+            delay = min(0.1 * 2 ** attempt, max_delay)
+            logger.info(f"Attempt {attempt + 1}: Search index '{index_name}' not ready yet. Waiting {delay:.1f}s...")
+            time.sleep(delay)
+        logger.error("Search index creation timed out after waiting.")
+        return False
+
 
 if __name__ == "__main__":
     # Create an instance of the custom MongoClient
@@ -213,24 +1038,17 @@ if __name__ == "__main__":
         database_name=database_name,
         collection_name=collection_name,
         index_name=index_name,
-        get_embedding=get_embedding,
         distance_metric=distance_metric,
+        num_dimensions=256,
     )
 
     # Step 2: Wait for the index to be created
     logger.info("Waiting for the search index to be available...")
     max_attempts = 10  # Maximum number of attempts to check
-    attempt = 0
-    while not client.index_exists(database_name, collection_name, index_name):
-        attempt += 1
-        if attempt > max_attempts:
-            logger.error("Search index creation timed out after waiting.")
-            break
-        logger.info(f"Attempt {attempt}: Search index '{index_name}' not ready yet. Waiting...")
-        time.sleep(1)  # Wait for 1 second before checking again
-
-    # Step 3: Check final status 
-    if client.index_exists(database_name, collection_name, index_name):
+    ready = client.wait_for_index(database_name, collection_name, index_name, max_attempts=max_attempts)
+
+    # Step 3: Check final status
+    if ready:
         logger.info(f"Search index '{index_name}' is now available!")
         print("Index is ready!")
     else: